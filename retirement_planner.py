@@ -1,11 +1,104 @@
 """Interactive Streamlit app to explore retirement scenarios."""
 
+import math
+import re
+import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
+import matplotlib
 import pandas as pd
+from collections import namedtuple
 from io import BytesIO
 from datetime import datetime, timedelta
 
+# Charts are only ever rendered to images, so skip the interactive backends
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+# One ``year:amount`` entry of the lump sum input, e.g. ``5: 20000``. Amounts
+# are limited to finite decimal or exponent notation so that float() never
+# sees the 'inf' / 'nan' spellings it would otherwise accept.
+_LUMP_SUM_RE = re.compile(r"(\d+)\s*:\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)")
+
+# Monthly projection series, one array per field
+Result = namedtuple("Result", "month age total real cum goal")
+
+# CSV column headers for each ``Result`` field
+RESULT_COLUMNS = {
+    "month": "Month",
+    "age": "Age",
+    "total": "Total Value",
+    "real": "Inflation-Adjusted Value",
+    "cum": "Cumulative Contributions",
+    "goal": "Reached Goal",
+}
+
+
+def _compound(cashflow, monthly_rate, start_balance, out):
+    """Write month-end balances for ``cashflow`` into ``out``.
+
+    Each month's flow is added before growth is applied, starting from
+    ``start_balance``.
+    """
+    # Discount the flows back to the first month, accumulate them and grow
+    # the running sum forward; every step writes into ``out``
+    growth = (1 + monthly_rate) ** np.arange(len(cashflow))
+    np.divide(cashflow, growth, out=out)
+    np.cumsum(out, out=out)
+    out += start_balance
+    out *= growth
+    out *= 1 + monthly_rate
+
+
+def _simulate(
+    months,
+    monthly_rate,
+    monthly_inflation,
+    monthly_contribution,
+    monthly_withdrawal,
+    retirement_month,
+    inflation_adjusted_withdrawals,
+    lump_sums,
+):
+    """Return nominal, real and contributed totals for each simulated month.
+
+    Rates are monthly fractions and ``retirement_month`` may be ``None`` to
+    keep contributing for the whole horizon.
+    """
+
+    # Split the timeline into the working and retired phases
+    if retirement_month is None:
+        retired_from = months + 1
+    else:
+        # Ceil keeps "month < retirement_month" for fractional retirement ages
+        retired_from = int(min(max(math.ceil(retirement_month), 0), months + 1))
+    inflation = (1 + monthly_inflation) ** np.arange(months + 1)
+
+    # Regular contributions while still employed, plus any lump sums
+    contributions = np.zeros(months + 1, dtype=np.float64)
+    contributions[:retired_from] = monthly_contribution
+    # Only whole-month keys line up with a simulated month
+    schedule = sorted((int(m), a) for m, a in lump_sums.items() if m == int(m))
+    lump_months = np.array([m for m, _ in schedule], dtype=np.int64)
+    lump_amounts = np.array([a for _, a in schedule], dtype=np.float64)
+    in_range = (lump_months >= 0) & (lump_months <= months)
+    contributions[lump_months[in_range]] += lump_amounts[in_range]
+
+    # Withdraw from the portfolio after retirement
+    cashflow = contributions.copy()
+    if inflation_adjusted_withdrawals:
+        cashflow[retired_from:] -= monthly_withdrawal * inflation[retired_from:]
+    else:
+        cashflow[retired_from:] -= monthly_withdrawal
+
+    # Compound each phase separately, carrying the balance at retirement over
+    balances = np.empty(months + 1, dtype=np.float64)
+    _compound(cashflow[:retired_from], monthly_rate, 0.0, balances[:retired_from])
+    at_retirement = balances[retired_from - 1] if retired_from else 0.0
+    _compound(cashflow[retired_from:], monthly_rate, at_retirement, balances[retired_from:])
+    real_balances = balances / inflation
+    cumulative_contributions = np.cumsum(contributions)
+    return balances, real_balances, cumulative_contributions
+
 
 def calculate_retirement_plan(
     current_age,
@@ -23,78 +116,58 @@ def calculate_retirement_plan(
 
     Parameters are expressed in annual percentages and monthly dollar amounts.
     ``lump_sums`` is a mapping of month indexes to contribution amounts.
-    The resulting ``DataFrame`` contains monthly values and progress toward the
-    savings goal or retirement age.
+    The resulting ``Result`` holds one array per field with monthly values and
+    progress toward the savings goal or retirement age.
     """
 
     # Convert year-based inputs to monthly units
     months = years * 12
-    current_month = 0
-    age = current_age
-    balance = 0
     monthly_rate = annual_growth / 12 / 100
     monthly_inflation = annual_inflation / 12 / 100
 
-    # Tracking containers for the simulation
-    balances = []
-    real_balances = []
-    cumulative_contributions = []
-    withdrawals = []
-    goal_progress = []
-    inflation_multiplier = 1.0
-    contribution_total = 0
-
-    # Determine target and retirement month in terms of months
-    target_balance = target_fund if target_fund > 0 else None
+    # Determine the retirement month in terms of months
     retirement_month = (retirement_age - current_age) * 12 if retirement_age else None
 
-    # Run the month-by-month simulation
-    for month in range(months + 1):
-        # Add any lump sum contributions for this month
-        if month in lump_sums:
-            balance += lump_sums[month]
-            contribution_total += lump_sums[month]
-
-        # Add regular contributions while still employed
-        if retirement_month is None or month < retirement_month:
-            balance += monthly_contribution
-            contribution_total += monthly_contribution
-        else:
-            # Withdraw from the portfolio after retirement
-            withdrawal = (
-                monthly_withdrawal * inflation_multiplier
-                if inflation_adjusted_withdrawals
-                else monthly_withdrawal
-            )
-            balance -= withdrawal
-            withdrawals.append(withdrawal)
-        # Apply monthly growth and track results
-        balance *= 1 + monthly_rate
-        balances.append(balance)
-        real_balances.append(balance / inflation_multiplier)
-        cumulative_contributions.append(contribution_total)
-        goal_progress.append(balance >= target_fund if target_fund else month >= retirement_month)
-        inflation_multiplier *= 1 + monthly_inflation
-
-    # Collect the results into a DataFrame for easy use in the UI
-    df = pd.DataFrame({
-        "Month": list(range(months + 1)),
-        "Age": [current_age + m // 12 for m in range(months + 1)],
-        "Total Value": balances,
-        "Inflation-Adjusted Value": real_balances,
-        "Cumulative Contributions": cumulative_contributions,
-        "Reached Goal": goal_progress,
-    })
-    return df
-
-
-def plot_growth(df):
+    # Run the simulation over the whole horizon
+    balances, real_balances, cumulative_contributions = _simulate(
+        months,
+        monthly_rate,
+        monthly_inflation,
+        monthly_contribution,
+        monthly_withdrawal,
+        retirement_month,
+        inflation_adjusted_withdrawals,
+        lump_sums,
+    )
+    month_index = np.arange(months + 1, dtype=np.int16)
+
+    # Progress toward the savings goal, or toward retirement if no goal is set
+    if target_fund:
+        goal_progress = balances >= target_fund
+    elif retirement_month is not None:
+        goal_progress = month_index >= retirement_month
+    else:
+        goal_progress = np.zeros(months + 1, dtype=bool)
+
+    # Collect the results as plain arrays for the UI. Dollar amounts stay in
+    # float64 so large balances keep cent precision in the CSV.
+    return Result(
+        month=month_index,
+        age=(current_age + month_index // 12).astype(np.int16),
+        total=balances,
+        real=real_balances,
+        cum=cumulative_contributions,
+        goal=goal_progress,
+    )
+
+
+def plot_growth(result):
     """Return a matplotlib figure showing portfolio growth."""
     fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df["Month"], df["Total Value"], label="Total Value")
+    ax.plot(result.month, result.total, label="Total Value")
     ax.plot(
-        df["Month"],
-        df["Inflation-Adjusted Value"],
+        result.month,
+        result.real,
         label="Inflation-Adjusted Value",
         linestyle="--",
     )
@@ -106,11 +179,11 @@ def plot_growth(df):
     return fig
 
 
-def plot_progress_vs_contribution(df):
+def plot_progress_vs_contribution(result):
     """Return a figure comparing contributions with portfolio value."""
     fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df["Month"], df["Cumulative Contributions"], label="Contributions", linestyle="--")
-    ax.plot(df["Month"], df["Total Value"], label="Total Value")
+    ax.plot(result.month, result.cum, label="Contributions", linestyle="--")
+    ax.plot(result.month, result.total, label="Total Value")
     ax.set_xlabel("Month")
     ax.set_ylabel("Value ($)")
     ax.set_title("Contributions vs Portfolio Value")
@@ -119,19 +192,49 @@ def plot_progress_vs_contribution(df):
     return fig
 
 
-def convert_df_to_csv(df):
-    """Encode the dataframe as CSV bytes for download."""
-    return df.to_csv(index=False).encode("utf-8")
+def convert_result_to_csv(result):
+    """Encode the projection as CSV bytes for download."""
+    df = pd.DataFrame({RESULT_COLUMNS[name]: values for name, values in result._asdict().items()})
+    buf = BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8")
+    return buf.getvalue()
 
 
-def convert_plot_to_png(fig):
+def convert_plot_to_png(fig, dpi=72, bbox_inches=None):
     """Serialize a matplotlib figure to PNG bytes."""
     buf = BytesIO()
-    fig.savefig(buf, format="png")
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches=bbox_inches)
     buf.seek(0)
     return buf
 
 
+@st.cache_data(max_entries=32, ttl=3600)
+def build_artifacts(params):
+    """Run the projection and render every displayed or downloadable artifact once.
+
+    ``params`` holds the keyword arguments of ``calculate_retirement_plan``
+    with ``lump_sums`` given as a sorted tuple of ``(month, amount)`` pairs so
+    equal inputs share a cache entry.
+    """
+    result = calculate_retirement_plan(**{**params, "lump_sums": dict(params["lump_sums"])})
+    artifacts = {"result": result, "csv": convert_result_to_csv(result)}
+    for name, plot in (("growth", plot_growth), ("progress", plot_progress_vs_contribution)):
+        fig = plot(result)
+        # Only the PNGs are cached; figures are never shared between reruns or
+        # sessions, so always release them from pyplot
+        try:
+            # Encoded twice on purpose: the on-screen copy matches st.pyplot
+            # (200 dpi, tight crop) while the download keeps the smaller,
+            # uncropped 72 dpi layout, and one PNG cannot serve both
+            artifacts[f"{name}_display"] = convert_plot_to_png(
+                fig, dpi=200, bbox_inches="tight"
+            ).getvalue()
+            artifacts[f"{name}_png"] = convert_plot_to_png(fig).getvalue()
+        finally:
+            plt.close(fig)
+    return artifacts
+
+
 def main():
     """Streamlit app entry point."""
     st.title("Retirement Planner")
@@ -158,36 +261,45 @@ def main():
         value="5:20000, 10:30000",
     )
     lump_sums = {}
-    try:
-        for pair in lump_years.split(","):
-            if ":" in pair:
-                y, a = pair.split(":")
-                lump_sums[int(y.strip()) * 12] = float(a.strip())
-    except Exception:
-        st.warning("Invalid lump sum format. Use format like '5:20000, 10:30000'")
+    invalid = []
+    for entry in lump_years.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = _LUMP_SUM_RE.fullmatch(entry)
+        if match:
+            lump_sums[int(match[1]) * 12] = float(match[2])
+        else:
+            invalid.append(entry)
+    if invalid:
+        st.warning(
+            f"Ignoring invalid lump sum entries: {', '.join(invalid)}. "
+            "Use format like '5:20000, 10:30000'"
+        )
 
     # --- Perform calculation when the user presses the button ---
     if st.button("Calculate Retirement Plan"):
-        df = calculate_retirement_plan(
-            current_age=current_age,
-            retirement_age=retirement_age,
-            target_fund=target_fund,
-            annual_growth=annual_growth,
-            annual_inflation=annual_inflation,
-            monthly_contribution=monthly_contribution,
-            monthly_withdrawal=monthly_withdrawal,
-            lump_sums=lump_sums,
-            years=years,
-            inflation_adjusted_withdrawals=inflation_adjusted_withdrawals,
-        )
+        artifacts = build_artifacts({
+            "current_age": current_age,
+            "retirement_age": retirement_age,
+            "target_fund": target_fund,
+            "annual_growth": annual_growth,
+            "annual_inflation": annual_inflation,
+            "monthly_contribution": monthly_contribution,
+            "monthly_withdrawal": monthly_withdrawal,
+            "lump_sums": tuple(sorted(lump_sums.items())),
+            "years": years,
+            "inflation_adjusted_withdrawals": inflation_adjusted_withdrawals,
+        })
 
         # Display when the savings goal will be reached (if provided)
         st.subheader("Progress Toward Retirement Goal")
         if target_fund > 0:
-            reached = df[df["Reached Goal"]]
-            if not reached.empty:
-                first_hit = reached.iloc[0]
-                months_to_goal = int(first_hit["Month"])
+            # Entries are one per month, so the first True index is the month
+            reached = artifacts["result"].goal
+            first_hit = int(reached.argmax())
+            if reached[first_hit]:
+                months_to_goal = first_hit
                 projected_date = datetime.today() + timedelta(days=months_to_goal * 30)
                 st.success(
                     f"Goal of ${target_fund:,.0f} will be reached in {months_to_goal // 12} years and {months_to_goal % 12} months."
@@ -198,29 +310,26 @@ def main():
         else:
             st.info(f"Plan simulates retirement at age {retirement_age}.")
 
-        # Generate and display charts
-        fig1 = plot_growth(df)
-        st.pyplot(fig1)
-
-        fig2 = plot_progress_vs_contribution(df)
-        st.pyplot(fig2)
+        # Display the pre-rendered charts
+        st.image(artifacts["growth_display"])
+        st.image(artifacts["progress_display"])
 
         # Provide downloads of the data and charts
         st.download_button(
             "Download Data as CSV",
-            convert_df_to_csv(df),
+            artifacts["csv"],
             "retirement_data.csv",
             "text/csv",
         )
         st.download_button(
             "Download Growth Chart",
-            convert_plot_to_png(fig1),
+            artifacts["growth_png"],
             "retirement_growth.png",
             "image/png",
         )
         st.download_button(
             "Download Progress Chart",
-            convert_plot_to_png(fig2),
+            artifacts["progress_png"],
             "contribution_vs_value.png",
             "image/png",
         )
@@ -0,0 +1,100 @@
+"""Check the vectorized projection against a month-by-month reference loop."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from retirement_planner import RESULT_COLUMNS, calculate_retirement_plan
+
+
+def reference_plan(
+    current_age,
+    retirement_age,
+    target_fund,
+    annual_growth,
+    annual_inflation,
+    monthly_contribution,
+    monthly_withdrawal,
+    lump_sums,
+    years,
+    inflation_adjusted_withdrawals,
+):
+    """Original scalar simulation, kept as the source of truth."""
+    months = years * 12
+    balance = 0
+    monthly_rate = annual_growth / 12 / 100
+    monthly_inflation = annual_inflation / 12 / 100
+    retirement_month = (retirement_age - current_age) * 12 if retirement_age else None
+    inflation_multiplier = 1.0
+    contribution_total = 0
+    columns = {
+        "Total Value": [],
+        "Inflation-Adjusted Value": [],
+        "Cumulative Contributions": [],
+        "Reached Goal": [],
+    }
+    for month in range(months + 1):
+        if month in lump_sums:
+            balance += lump_sums[month]
+            contribution_total += lump_sums[month]
+        if retirement_month is None or month < retirement_month:
+            balance += monthly_contribution
+            contribution_total += monthly_contribution
+        else:
+            balance -= (
+                monthly_withdrawal * inflation_multiplier
+                if inflation_adjusted_withdrawals
+                else monthly_withdrawal
+            )
+        balance *= 1 + monthly_rate
+        columns["Total Value"].append(balance)
+        columns["Inflation-Adjusted Value"].append(balance / inflation_multiplier)
+        columns["Cumulative Contributions"].append(contribution_total)
+        columns["Reached Goal"].append(
+            balance >= target_fund if target_fund else month >= retirement_month
+        )
+        inflation_multiplier *= 1 + monthly_inflation
+    return columns
+
+
+CASES = [
+    dict(
+        current_age=current_age,
+        retirement_age=retirement_age,
+        target_fund=target_fund,
+        annual_growth=annual_growth,
+        annual_inflation=2.5,
+        monthly_contribution=1000.0,
+        monthly_withdrawal=4000.0,
+        lump_sums=lump_sums,
+        years=years,
+        inflation_adjusted_withdrawals=adjusted,
+    )
+    for current_age, retirement_age, target_fund, annual_growth, lump_sums, years, adjusted
+    in itertools.product(
+        [35],
+        [65, 65.5, 30, 120],
+        [1_000_000.0, 0.0],
+        [7.0, 0.0],
+        [{}, {60: 20000.0, 120.0: 30000.0, 60.5: 999.0, 9999: 5.0}, {30.5: 999.0}],
+        [50, 1],
+        [True, False],
+    )
+]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_matches_reference_loop(params):
+    result = calculate_retirement_plan(**params)
+    expected = reference_plan(**params)
+    fields = {column: name for name, column in RESULT_COLUMNS.items()}
+    for column, values in expected.items():
+        values = np.asarray(values)
+        actual = getattr(result, fields[column])
+        if values.dtype == bool:
+            np.testing.assert_array_equal(actual, values)
+        else:
+            # Only rounding may differ, so compare against the series' scale
+            scale = max(np.abs(values).max(), 1.0)
+            np.testing.assert_allclose(actual, values, rtol=0, atol=1e-9 * scale)